@@ -1,37 +1,44 @@
 import streamlit as st
 import streamlit.components.v1 as components
+from src.utils import commit_writes_async, take_failed_write
 from src.ui.views import landing_page, lobby_page, game_page
 
+GA_SNIPPET = """
+<!-- Google tag (gtag.js) -->
+<script async src="https://www.googletagmanager.com/gtag/js?id=G-J1BNPF4QCV"></script>
+<script>
+  window.dataLayer = window.dataLayer || [];
+  function gtag(){dataLayer.push(arguments);}
+  gtag('js', new Date());
+  gtag('config', 'G-J1BNPF4QCV');
+</script>
+"""
+
+_PAGES = {"landing": landing_page, "lobby": lobby_page, "game": game_page}
+
 def main() -> None:
     st.set_page_config(page_title="Kaboom Lobby", page_icon="💣")
-    # Inject GA4 script so it's present on every page
-    components.html(
-        """
-        <!-- Google tag (gtag.js) -->
-        <script async src="https://www.googletagmanager.com/gtag/js?id=G-J1BNPF4QCV"></script>
-        <script>
-          window.dataLayer = window.dataLayer || [];
-          function gtag(){dataLayer.push(arguments);}
-          gtag('js', new Date());
-          gtag('config', 'G-J1BNPF4QCV');
-        </script>
-        """,
-        height=0,
-    )
+    # Emitted on every run: an element a rerun skips is unmounted, while an
+    # identical one stays mounted without reloading.
+    components.html(GA_SNIPPET, height=0)
 
     if "page" not in st.session_state:
         st.session_state.page = "landing"
 
-    page = st.session_state.page
-    if page == "landing":
-        landing_page()
-    elif page == "lobby":
-        lobby_page()
-    elif page == "game":
-        game_page()
-    else:
+    # The game page reconciles its own failed writes (see render_room_game).
+    if st.session_state.page != "game" and take_failed_write() is not None:
+        st.warning("A room update could not be saved. Please try again.")
+
+    render_page = _PAGES.get(st.session_state.page)
+    if render_page is None:
         st.session_state.page = "landing"
-        landing_page()
+        render_page = landing_page
+    try:
+        render_page()
+    finally:
+        # Runs on st.rerun()/st.stop() too, so queued writes are never lost.
+        # They go out in the background; join/start write synchronously.
+        commit_writes_async()
 
 
 if __name__ == "__main__":
@@ -1 +1,15 @@
-from .firebase_client import fb_get, fb_post, fb_patch, fb_put, current_timestamp
+from .firebase_client import (
+    fb_get,
+    fb_get_with_etag,
+    fb_post,
+    fb_patch,
+    fb_put,
+    fb_cas_put,
+    fb_cas_patch,
+    fb_put_if_match,
+    fb_flush,
+    fb_flush_async,
+    current_timestamp,
+    FirebaseListener,
+    FirebaseConflict,
+)
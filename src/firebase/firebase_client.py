@@ -1,10 +1,53 @@
 # firebase_client.py
+import queue
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 import requests
-from typing import Any, Dict, Optional
+from requests.adapters import HTTPAdapter
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+from urllib3.util.retry import Retry
 
 FIREBASE_URL = "https://kaboom-web-app-default-rtdb.firebaseio.com"
 
+# Seconds before a stalled Firebase call gives up instead of freezing the rerun.
+REQUEST_TIMEOUT = 5
+
+# Bodies are encoded with orjson (several times faster than json for the
+# nested game-state dicts) and sent as raw bytes with this header.
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# One pooled session so every call reuses the same keep-alive TLS connection.
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=8,
+        pool_maxsize=16,
+        max_retries=Retry(
+            total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504)
+        ),
+    ),
+)
+
+
+# Background writer for fb_flush_async (write-behind of game actions).
+_WRITER = ThreadPoolExecutor(max_workers=4, thread_name_prefix="fb-writer")
+
+# Writes are queued per script thread (Streamlit runs each session's rerun on
+# its own thread) and sent by fb_flush(). Consecutive writes to the same path
+# are merged into a single request.
+_local = threading.local()
+
+
+def _pending_writes() -> List[List[Any]]:
+    pending = getattr(_local, "pending", None)
+    if pending is None:
+        pending = _local.pending = []
+    return pending
+
 
 def _make_url(path: str) -> str:
     # Ensure path starts with a slash and append .json for RTDB REST API
@@ -13,11 +56,43 @@ def _make_url(path: str) -> str:
     return f"{FIREBASE_URL}{path}.json"
 
 
-def fb_get(path: str) -> Any:
+def fb_get(path: str, params: Optional[Dict[str, str]] = None) -> Any:
+    # Send queued writes first so reads always see this session's own changes.
+    fb_flush()
     url = _make_url(path)
-    resp = requests.get(url)
+    resp = _SESSION.get(url, params=params, timeout=REQUEST_TIMEOUT)
     resp.raise_for_status()
-    return resp.json()
+    return orjson.loads(resp.content)
+
+
+def fb_get_with_etag(path: str) -> Tuple[Any, str]:
+    """
+    Read `path` together with its ETag, for a later fb_put_if_match.
+    """
+    fb_flush()
+    resp = _SESSION.get(
+        _make_url(path), headers={"X-Firebase-ETag": "true"}, timeout=REQUEST_TIMEOUT
+    )
+    resp.raise_for_status()
+    return orjson.loads(resp.content), resp.headers["ETag"]
+
+
+def fb_put_if_match(path: str, data: Any, etag: str) -> bool:
+    """
+    Immediate conditional PUT. Returns False (writing nothing) if `path`
+    changed since `etag` was read.
+    """
+    fb_flush()
+    resp = _SESSION.put(
+        _make_url(path),
+        data=orjson.dumps(data),
+        headers={**_JSON_HEADERS, "if-match": etag},
+        timeout=REQUEST_TIMEOUT,
+    )
+    if resp.status_code == 412:
+        return False
+    resp.raise_for_status()
+    return True
 
 
 def fb_post(path: str, data: Dict) -> str:
@@ -25,24 +100,313 @@ def fb_post(path: str, data: Dict) -> str:
     POST to /rooms -> creates new child with unique key.
     Returns generated key.
     """
+    fb_flush()
     url = _make_url(path)
-    resp = requests.post(url, json=data)
+    resp = _SESSION.post(
+        url, data=orjson.dumps(data), headers=_JSON_HEADERS, timeout=REQUEST_TIMEOUT
+    )
     resp.raise_for_status()
-    res = resp.json()
+    res = orjson.loads(resp.content)
     return res["name"]  # Firebase returns {"name": "<key>"}
 
 
+def _can_merge(method: str, queued: Dict, data: Dict) -> bool:
+    """
+    A PATCH may fold into the previous write of the same path unless it uses
+    multi-path keys ("a/b") against a PUT body, or one of its keys is an
+    ancestor/descendant of a queued key (Firebase rejects overlapping paths).
+    """
+    for key in data:
+        if method in ("put", "cas") and "/" in key:
+            return False
+        for existing in queued:
+            if key != existing and (
+                key.startswith(existing + "/") or existing.startswith(key + "/")
+            ):
+                return False
+    return True
+
+
 def fb_patch(path: str, data: Dict) -> None:
-    url = _make_url(path)
-    resp = requests.patch(url, json=data)
-    resp.raise_for_status()
+    pending = _pending_writes()
+    if pending and pending[-1][1] == path and isinstance(pending[-1][2], dict):
+        method, _, queued, _ = pending[-1]
+        if _can_merge(method, queued, data):
+            # PATCH on top of a queued PUT/PATCH of the same path: merge fields.
+            pending[-1][2] = {**queued, **data}
+            return
+    pending.append(["patch", path, dict(data), None])
 
 
 def fb_put(path: str, data: Any) -> None:
+    _queue_put("put", path, data, None)
+
+
+def fb_cas_put(path: str, data: Dict, expected_version: int) -> None:
+    """
+    Compare-and-set PUT: only replaces `path` if its `version` child still
+    equals `expected_version` and nobody writes in between (ETag if-match).
+    Otherwise the flush raises FirebaseConflict and nothing is written.
+    """
+    _queue_put("cas", path, data, expected_version)
+
+
+def fb_cas_patch(path: str, data: Dict, expected_version: int) -> None:
+    """
+    PATCH that is dropped (FirebaseConflict) unless `path`/version still
+    equals `expected_version`. Firebase has no conditional PATCH, so the
+    writer first claims `expected_version + 1` with a conditional PUT on the
+    version child; of two racing writers only one can win that claim.
+    """
+    _pending_writes().append(["cas_patch", path, dict(data), expected_version])
+
+
+def _queue_put(method: str, path: str, data: Any, expected: Optional[int]) -> None:
+    pending = _pending_writes()
+    if pending and pending[-1][1] == path:
+        queued_method, _, _, queued_expected = pending[-1]
+        if method == "put":
+            # A PUT replaces whatever was queued for the same path.
+            pending[-1] = [method, path, data, expected]
+            return
+        if queued_method in ("cas", "cas_patch"):
+            # The server has not seen the queued write, so the combined
+            # write must still expect the version that one expected.
+            pending[-1] = [method, path, data, queued_expected]
+            return
+    pending.append([method, path, data, expected])
+
+
+class FirebaseConflict(Exception):
+    """A compare-and-set write lost against a newer server value."""
+
+
+def _send(method: str, path: str, body: bytes, expected: Optional[int]) -> None:
     url = _make_url(path)
-    resp = requests.put(url, json=data)
+    headers = _JSON_HEADERS
+    if method == "cas":
+        current = _SESSION.get(
+            url, headers={"X-Firebase-ETag": "true"}, timeout=REQUEST_TIMEOUT
+        )
+        current.raise_for_status()
+        value = orjson.loads(current.content)
+        version = value.get("version", 0) if isinstance(value, dict) else 0
+        if version != expected:
+            raise FirebaseConflict(f"{path}: version {version}, expected {expected}")
+        method = "put"
+        headers = {**_JSON_HEADERS, "if-match": current.headers["ETag"]}
+    elif method == "cas_patch":
+        # Claim the next version atomically (conditional PUT on the version
+        # child); only the writer that wins the claim sends its fields.
+        version_url = _make_url(f"{path}/version")
+        current = _SESSION.get(
+            version_url, headers={"X-Firebase-ETag": "true"}, timeout=REQUEST_TIMEOUT
+        )
+        current.raise_for_status()
+        version = orjson.loads(current.content) or 0
+        if version != expected:
+            raise FirebaseConflict(f"{path}: version {version}, expected {expected}")
+        claim = _SESSION.put(
+            version_url,
+            data=orjson.dumps(expected + 1),
+            headers={**_JSON_HEADERS, "if-match": current.headers["ETag"]},
+            timeout=REQUEST_TIMEOUT,
+        )
+        if claim.status_code == 412:
+            raise FirebaseConflict(f"{path}: version claimed by another writer")
+        claim.raise_for_status()
+        method = "patch"
+    resp = _SESSION.request(
+        method, url, data=body, headers=headers, timeout=REQUEST_TIMEOUT
+    )
+    if resp.status_code == 412:
+        raise FirebaseConflict(f"{path}: changed during write")
     resp.raise_for_status()
 
 
+def fb_flush() -> None:
+    """
+    Send all queued writes, in order. Call at the end of every script run.
+    """
+    pending = _pending_writes()
+    while pending:
+        method, path, data, expected = pending.pop(0)
+        _send(method, path, orjson.dumps(data), expected)
+
+
+def _send_batch(batch: List[Any], done: Future) -> None:
+    if not done.set_running_or_notify_cancel():
+        return
+    try:
+        for method, path, body, expected in batch:
+            _send(method, path, body, expected)
+    except BaseException as exc:
+        done.set_exception(exc)
+    else:
+        done.set_result(None)
+
+
+def fb_flush_async(after: Optional[Future] = None) -> Optional[Future]:
+    """
+    Hand the queued writes to a background thread and return their Future
+    (None if nothing was queued). Bodies are encoded here, so the caller may
+    keep mutating its state. Pass the session's previous Future as `after`
+    to keep its writes ordered: the batch is only submitted once that one
+    has finished, so no worker sits waiting on it. If that batch failed,
+    this one is not sent and its Future fails with the same exception, so
+    the error carries down the chain to whoever checks the newest Future.
+    """
+    pending = _pending_writes()
+    if not pending:
+        return None
+    batch = [
+        (method, path, orjson.dumps(data), expected)
+        for method, path, data, expected in pending
+    ]
+    pending.clear()
+    done: Future = Future()
+
+    def submit(_: Optional[Future] = None) -> None:
+        failed = after.exception() if after is not None else None
+        if failed is not None:
+            if done.set_running_or_notify_cancel():
+                done.set_exception(failed)
+            return
+        _WRITER.submit(_send_batch, batch, done)
+
+    if after is None:
+        submit()
+    else:
+        # Runs right away if `after` is already done.
+        after.add_done_callback(submit)
+    return done
+
+
+def _with_path(node: Any, keys: List[str], value: Any) -> Any:
+    """
+    Copy-on-write update: returns `node` with `value` stored under `keys`.
+    Only the containers along the path are copied, so earlier snapshots
+    handed out to readers are never mutated.
+    """
+    if not keys:
+        return value
+    head, rest = keys[0], keys[1:]
+    if isinstance(node, list) and head.isdigit():
+        copy: Any = list(node)
+        index = int(head)
+        copy.extend([None] * (index + 1 - len(copy)))
+        copy[index] = _with_path(copy[index], rest, value)
+        return copy
+    copy = dict(node) if isinstance(node, dict) else {}
+    child = _with_path(copy.get(head), rest, value)
+    if child is None:
+        copy.pop(head, None)
+    else:
+        copy[head] = child
+    return copy or None
+
+
+class FirebaseListener:
+    """
+    Background subscription to an RTDB path over the REST streaming API
+    (Server-Sent Events). Every change after the initial snapshot is pushed
+    onto `events` as (event, data); the thread reconnects on errors until
+    stop() is called or nobody has drained it for IDLE_TIMEOUT (e.g. the
+    browser tab was closed). `value` mirrors the path's current contents
+    once `ready` is set. `failed` is set if Firebase cancels the stream
+    (rules or auth); callers should fall back to polling then.
+    """
+
+    # Seconds without any bytes (Firebase sends keep-alives every ~30s).
+    READ_TIMEOUT = 60
+
+    # Seconds without drain()/touch() before the thread stops on its own.
+    IDLE_TIMEOUT = 300
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.events: "queue.Queue[Any]" = queue.Queue()
+        self.value: Any = None
+        self.ready = threading.Event()
+        self.failed = False
+        self._last_used = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"fb-listener:{path}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def touch(self) -> None:
+        """Mark the subscription as still in use (resets the idle timeout)."""
+        self._last_used = time.monotonic()
+
+    def _done(self) -> bool:
+        idle = time.monotonic() - self._last_used > self.IDLE_TIMEOUT
+        return idle or self._stop.is_set()
+
+    def drain(self) -> bool:
+        """Discard queued events; returns True if there were any."""
+        self.touch()
+        changed = False
+        while True:
+            try:
+                self.events.get_nowait()
+            except queue.Empty:
+                return changed
+            changed = True
+
+    def _run(self) -> None:
+        first_snapshot = True
+        while not self._done():
+            try:
+                with requests.get(
+                    _make_url(self.path),
+                    headers={"Accept": "text/event-stream"},
+                    stream=True,
+                    timeout=(REQUEST_TIMEOUT, self.READ_TIMEOUT),
+                ) as resp:
+                    resp.raise_for_status()
+                    event = None
+                    for line in resp.iter_lines(decode_unicode=True):
+                        if self._done():
+                            return
+                        if line.startswith("event:"):
+                            event = line[len("event:"):].strip()
+                        elif line.startswith("data:") and event in ("put", "patch"):
+                            data = orjson.loads(line[len("data:"):].strip())
+                            self._apply(event, data)
+                            if first_snapshot:
+                                # The initial put is the current value, not a change.
+                                first_snapshot = False
+                                self.ready.set()
+                                continue
+                            self.events.put((event, data))
+                        elif event in ("cancel", "auth_revoked"):
+                            self.failed = True
+                            return
+            except (requests.RequestException, ValueError):
+                pass
+            # Dropped connection: back off briefly, then resubscribe.
+            self._stop.wait(1.0)
+
+    def _apply(self, event: str, payload: Dict) -> None:
+        keys = [key for key in payload.get("path", "/").split("/") if key]
+        data = payload.get("data")
+        if event == "put":
+            self.value = _with_path(self.value, keys, data)
+            return
+        value = self.value
+        for key, child in (data or {}).items():
+            value = _with_path(value, keys + key.split("/"), child)
+        self.value = value
+
+
 def current_timestamp() -> float:
     return time.time()
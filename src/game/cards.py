@@ -3,32 +3,44 @@ from typing import List, Tuple
 
 Card = Tuple[str, str]
 
-RANKS = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K']
-SUITS = ['♠', '♥', '♦', '♣']
+RANKS = ('A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K')
+SUITS = ('♠', '♥', '♦', '♣')
+
+_RED_SUITS = frozenset(('♥', '♦'))
+_FACE_RANKS = frozenset(('J', 'Q', 'K'))
+
+_RANK_VALUE = {
+    rank: 1 if rank == 'A' else 10 if rank in _FACE_RANKS else int(rank)
+    for rank in RANKS
+}
+_RED_KINGS = frozenset(('K', suit) for suit in _RED_SUITS)
+
+# Every label formatted once at import; card_label is a dict lookup.
+_LABEL_TABLE = {(rank, suit): f"{rank}{suit}" for rank in RANKS for suit in SUITS}
+
+# Ordered 52-card template, built once at import; create_deck samples from it.
+_DECK_TEMPLATE: Tuple[Card, ...] = tuple(
+    (rank, suit) for rank in RANKS for suit in SUITS
+)
 
 
 def create_deck() -> List[Card]:
-    deck = [(rank, suit) for rank in RANKS for suit in SUITS]
-    random.shuffle(deck)
-    return deck
+    # A full-length sample is a shuffled copy, produced in one C-level call.
+    return random.sample(_DECK_TEMPLATE, len(_DECK_TEMPLATE))
 
 
 def card_label(card: Card) -> str:
     rank, suit = card
-    return f"{rank}{suit}"
+    # Same tuple key as card_value: Firebase hands cards back as lists.
+    return _LABEL_TABLE[(rank, suit)]
 
 
 def is_red_king(card: Card) -> bool:
     rank, suit = card
-    return rank == 'K' and suit in ['♥', '♦']
+    return rank == 'K' and suit in _RED_SUITS
 
 
 def card_value(card: Card) -> int:
-    if is_red_king(card):
-        return 0
-    rank, _ = card
-    if rank == 'A':
-        return 1
-    if rank in ['J', 'Q', 'K']:
-        return 10
-    return int(rank)
+    rank, suit = card
+    # Cards loaded from Firebase are lists, so key the lookup on a tuple.
+    return 0 if (rank, suit) in _RED_KINGS else _RANK_VALUE[rank]
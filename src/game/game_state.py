@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 import time
+from operator import itemgetter
 from typing import Any, Dict, List, Optional
 
 import streamlit as st
 
-from src.game.cards import (Card, card_value, create_deck)
+from src.game.cards import (Card, create_deck, _RANK_VALUE, _RED_KINGS)
 
 GameState = Dict[str, Any]
 
@@ -17,37 +18,141 @@ def _default_player_names(players: List[Dict[str, Any]]) -> List[str]:
 def create_game_state(
     max_players: int, room_players: List[Dict[str, Any]]
 ) -> GameState:
-    players = [
-        {
-            "id": player["id"],
-            "name": player["name"],
-            "hand": [],
-            "active": True,
-            "revealed": False,
-        }
-        for player in room_players
-    ]
+    # The room player dicts are built fresh for each call, so they are
+    # extended in place with the per-game fields rather than copied.
+    players = list(room_players)
+    for player in players:
+        player["hand"] = []
+        player["active"] = True
+        player["revealed"] = False
     current_player_id = players[0]["id"] if players else None
+    deck = create_deck()
     return {
         "phase": "setup",
         "num_players": max_players,
         "player_names": _default_player_names(players),
         "players": players,
-        "deck": create_deck(),
+        "deck": deck,
+        "deck_top": len(deck),
         "discard_pile": [],
+        "top_discard": None,
         "current_player_id": current_player_id,
         "drawn_card": None,
         "peeks_used": {player["id"]: 0 for player in players},
-        "peeked_cards": [],
+        "peeked_cards": {player["id"]: 0 for player in players},
         "peek_log": [],
         "peeking_player_id": current_player_id,
         "kaboom_caller_id": None,
         "final_scores": [],
         "reaction_state": None,
         "instant_winner_id": None,
+        "version": 0,
+        "last_writer": None,
+        "_player_index": {player["id"]: idx for idx, player in enumerate(players)},
     }
 
 
+def _player_index(state: GameState) -> Dict[str, int]:
+    """
+    id -> seat index. Runtime-only (stripped before saving): built when the
+    players list is created or unpacked, and lazily for any other state.
+    Rebuild it (pop the key) if the players list is ever reordered.
+    """
+    index = state.get("_player_index")
+    if index is None:
+        index = state["_player_index"] = {
+            player["id"]: idx for idx, player in enumerate(state["players"])
+        }
+    return index
+
+
+def find_player(
+    state: GameState, player_id: Optional[str]
+) -> Optional[Dict[str, Any]]:
+    idx = _player_index(state).get(player_id)
+    return None if idx is None else state["players"][idx]
+
+
+def find_player_index(state: GameState, player_id: Optional[str]) -> Optional[int]:
+    return _player_index(state).get(player_id)
+
+
+def _active_mask(state: GameState) -> int:
+    # Bit i is set when state["players"][i] is still active (runtime-only).
+    mask = state.get("_active_mask")
+    if mask is None:
+        mask = 0
+        for idx, player in enumerate(state["players"]):
+            if player["active"]:
+                mask |= 1 << idx
+        state["_active_mask"] = mask
+    return mask
+
+
+def set_player_active(state: GameState, player_id: str, active: bool) -> None:
+    idx = find_player_index(state, player_id)
+    if idx is None:
+        return
+    state["players"][idx]["active"] = active
+    bit = 1 << idx
+    mask = _active_mask(state)
+    state["_active_mask"] = mask | bit if active else mask & ~bit
+
+
+def pack_players(state: GameState) -> Dict[str, Any]:
+    """
+    Column (SoA) form of state["players"] as stored in Firebase: parallel
+    id/name/hand lists indexed by seat, plus active/revealed as int bitmasks.
+    """
+    players = state["players"]
+    active_mask = revealed_mask = 0
+    for idx, player in enumerate(players):
+        if player["active"]:
+            active_mask |= 1 << idx
+        if player["revealed"]:
+            revealed_mask |= 1 << idx
+    return {
+        "player_ids": [player["id"] for player in players],
+        "player_names": [player["name"] for player in players],
+        "hands": [player["hand"] for player in players],
+        "active_mask": active_mask,
+        "revealed_mask": revealed_mask,
+    }
+
+
+def unpack_players(state: GameState) -> None:
+    """
+    Rebuild state["players"] from the stored columns (in place). Firebase
+    drops empty lists and may return sparse lists as dicts, so missing hands
+    come back as [].
+    """
+    ids = state.pop("player_ids", None) or []
+    names = state.get("player_names") or []
+    hands = state.pop("hands", None) or []
+    if isinstance(hands, dict):
+        hands = [hands.get(str(idx)) for idx in range(len(ids))]
+    active_mask = state.pop("active_mask", 0)
+    revealed_mask = state.pop("revealed_mask", 0)
+    state["players"] = [
+        {
+            "id": pid,
+            "name": names[idx] if idx < len(names) else "Player",
+            "hand": list((hands[idx] if idx < len(hands) else None) or []),
+            "active": bool(active_mask >> idx & 1),
+            "revealed": bool(revealed_mask >> idx & 1),
+        }
+        for idx, pid in enumerate(ids)
+    ]
+    state["_player_index"] = {pid: idx for idx, pid in enumerate(ids)}
+    state["_active_mask"] = active_mask
+
+
+def bump_version(state: GameState, writer_id: Optional[str]) -> None:
+    # Monotonic per-write counter used to reconcile optimistic local copies.
+    state["version"] = state.get("version", 0) + 1
+    state["last_writer"] = writer_id
+
+
 def init_state(
     state: GameState,
     max_players: int = 2,
@@ -60,34 +165,83 @@ def init_state(
 
 def deal_initial_hands(state: GameState) -> None:
     for player in state["players"]:
-        hand: List[Card] = []
-        for _ in range(4):
-            if not state["deck"]:
-                state["deck"] = create_deck()
-            hand.append(state["deck"].pop())
-        player["hand"] = hand
+        player["hand"] = [draw_from_deck(state) for _ in range(4)]
         player["active"] = True
         player["revealed"] = False
+    state.pop("_active_mask", None)
     state["phase"] = "pre_peek"
     state["drawn_card"] = None
     state["peek_log"] = []
-    state["peeked_cards"] = []
+    state["peeked_cards"] = {player["id"]: 0 for player in state["players"]}
     state["peeks_used"] = {player["id"]: 0 for player in state["players"]}
     state["kaboom_caller_id"] = None
     state["instant_winner_id"] = None
     first_player = state["players"][0] if state["players"] else None
     state["current_player_id"] = first_player["id"] if first_player else None
     state["peeking_player_id"] = state["current_player_id"]
+    refresh_min_hand_len(state)
+
+
+def refresh_min_hand_len(state: GameState) -> None:
+    """
+    Cache the smallest active hand size so callers can skip
+    check_instant_win unless some hand is actually empty. Call after any
+    change to a hand's length.
+    """
+    state["min_hand_len"] = min(
+        (len(player["hand"]) for player in state["players"] if player["active"]),
+        default=0,
+    )
+
+
+# peeked_cards maps player_id -> bitmask of that player's peeked card
+# indexes, so each player only ever writes their own entry.
+def peek_bit(card_idx: int) -> int:
+    return 1 << card_idx
+
+
+def is_peeked(state: GameState, player_id: str, card_idx: int) -> bool:
+    mask = (state.get("peeked_cards") or {}).get(player_id, 0)
+    return bool(mask & peek_bit(card_idx))
+
+
+def mark_peeked(state: GameState, player_id: str, card_idx: int) -> None:
+    peeked = state.get("peeked_cards") or {}
+    peeked[player_id] = peeked.get(player_id, 0) | peek_bit(card_idx)
+    state["peeked_cards"] = peeked
+
+
+def _push_discard(state: GameState, card: Card) -> None:
+    pile = state.setdefault("discard_pile", [])
+    pile.append(card)
+    state["top_discard"] = card
+
+
+def deck_remaining(state: GameState) -> int:
+    """
+    Cards left to draw. The deck list is never shrunk; `deck_top` counts down
+    through it. States saved before `deck_top` existed fall back to the length.
+    """
+    top = state.get("deck_top")
+    if top is None:
+        top = state["deck_top"] = len(state.get("deck") or [])
+    return top
 
 
 def draw_from_deck(state: GameState) -> Card:
-    if not state["deck"]:
+    top = deck_remaining(state)
+    if top == 0:
         state["deck"] = create_deck()
-    return state["deck"].pop()
+        top = len(state["deck"])
+    top -= 1
+    state["deck_top"] = top
+    return state["deck"][top]
 
 
 def hand_total(hand: List[Card]) -> int:
-    return sum(card_value(card) for card in hand)
+    return sum(
+        0 if (rank, suit) in _RED_KINGS else _RANK_VALUE[rank] for rank, suit in hand
+    )
 
 
 def check_instant_win(state: GameState) -> Optional[str]:
@@ -105,33 +259,27 @@ def end_game_instant_win(state: GameState, winner_id: str) -> None:
 
 
 def compute_final_scores(state: GameState) -> None:
-    scores = []
-    for player in state["players"]:
-        total = hand_total(player["hand"])
-        scores.append((player["id"], player["name"], total))
-    scores.sort(key=lambda item: item[2])
+    # Every row is displayed on the game-over screen, so a full sort is needed.
+    scores = [
+        (player["id"], player["name"], hand_total(player["hand"]))
+        for player in state["players"]
+    ]
+    scores.sort(key=itemgetter(2))
     state["final_scores"] = scores
 
 
 def advance_turn(state: GameState) -> None:
-    if not state["players"]:
-        return
     order = state["players"]
-    if not any(player["active"] for player in order):
+    n = len(order)
+    mask = _active_mask(state) if order else 0
+    if not mask:
         return
-    current_id = state["current_player_id"]
-    start_index = 0
-    if current_id is not None:
-        for idx, player in enumerate(order):
-            if player["id"] == current_id:
-                start_index = idx
-                break
-    idx = start_index
-    while True:
-        idx = (idx + 1) % len(order)
-        if order[idx]["active"]:
-            state["current_player_id"] = order[idx]["id"]
-            break
+    start = find_player_index(state, state["current_player_id"]) or 0
+    # Rotate so bit j means "player (start + 1 + j) % n is active"; the lowest
+    # set bit is then the next active player in turn order.
+    rotated = ((mask >> (start + 1)) | (mask << (n - start - 1))) & ((1 << n) - 1)
+    offset = (rotated & -rotated).bit_length() - 1
+    state["current_player_id"] = order[(start + 1 + offset) % n]["id"]
 
 
 def trigger_reaction(
@@ -163,12 +311,11 @@ def complete_reaction(state: GameState) -> None:
 
 def award_penalty_card(state: GameState, player_id: str) -> None:
     penalty_card = draw_from_deck(state)
-    target = next(
-        (player for player in state["players"] if player["id"] == player_id), None
-    )
+    target = find_player(state, player_id)
     if not target:
         return
     target["hand"].append(penalty_card)
+    refresh_min_hand_len(state)
     st.warning("Incorrect match! A hidden penalty card was added to your hand.")
     complete_reaction(state)
     st.rerun()
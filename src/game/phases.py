@@ -2,42 +2,279 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
+import orjson
 import streamlit as st
-from streamlit_autorefresh import st_autorefresh
 
-from src.firebase import fb_get, fb_put
+from src.firebase import (
+    FirebaseConflict,
+    FirebaseListener,
+    fb_cas_patch,
+    fb_cas_put,
+    fb_get,
+    fb_patch,
+)
 from src.game.cards import Card, card_label
 from src.game.game_state import (
     GameState,
     create_game_state,
     deal_initial_hands,
     draw_from_deck,
+    deck_remaining,
     check_instant_win,
     end_game_instant_win,
     compute_final_scores,
     advance_turn,
+    bump_version,
+    find_player,
+    find_player_index,
+    is_peeked,
+    mark_peeked,
+    pack_players,
+    set_player_active,
+    unpack_players,
+    _push_discard,
 )
+from src.multiplayer.room_store import room_changed, subscribe_room, unsubscribe_room
+from src.utils import commit_writes_async, take_failed_write, writes_in_flight
 
 # ---------- Firebase helpers ----------
 
+# Left out of the write diff: players are diffed in column form, and the
+# version fields change on every write by design.
+_UNDIFFED_KEYS = frozenset({"players", "version", "last_writer"})
+
 
 def _game_state_path(room_id: str) -> str:
     return f"/rooms/{room_id}/game_state"
 
 
-def load_game_state(room_id: str) -> Optional[GameState]:
-    data = fb_get(_game_state_path(room_id))
-    return data or None
+def _run_cache() -> Dict[str, Any]:
+    # Firebase reads memoized for the current script run only; reset at the
+    # top of render_room_game.
+    return st.session_state.setdefault("_fb_run_cache", {})
+
+
+def _cached_fb_get(path: str) -> Any:
+    cache = _run_cache()
+    if path not in cache:
+        cache[path] = fb_get(path)
+    return cache[path]
+
+
+def _local_states() -> Dict[str, GameState]:
+    # Optimistic copies of states this session wrote but Firebase may not
+    # have acknowledged yet (writes are sent in the background).
+    return st.session_state.setdefault("local_state", {})
+
+
+def load_game_state(
+    room_id: str, room: Optional[Dict[str, Any]] = None
+) -> Optional[GameState]:
+    path = _game_state_path(room_id)
+    cache = _run_cache()
+    if path not in cache and room is not None:
+        # The room snapshot already contains game_state; no extra GET.
+        cache[path] = room.get("game_state")
+    data = _cached_fb_get(path)
+    local = _local_states().get(room_id)
+    if local is not None:
+        server = data or {}
+        # Version numbers alone are ambiguous (two writers can both produce
+        # local + 1), so our write is confirmed only by (version, writer).
+        confirmed = (server.get("version"), server.get("last_writer")) == (
+            local.get("version"),
+            local.get("last_writer"),
+        )
+        if not confirmed and (
+            writes_in_flight() or server.get("version", 0) < local.get("version", 0)
+        ):
+            # Our own write has not landed yet: keep showing the local result.
+            return local
+        # Firebase has caught up (or someone else moved on): server wins.
+        _local_states().pop(room_id, None)
+    if not data:
+        return None
+    state = dict(data)
+    if "player_ids" in state or "players" not in state:
+        # Column layout (see pack_players) is authoritative whenever present.
+        state.pop("players", None)
+        unpack_players(state)
+    else:
+        # Saved before the column layout: ensure_game_state rewrites it once,
+        # before any delta can target "hands/...".
+        state["_legacy_layout"] = True
+    return state
+
+
+def _field_encodings(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Per-field encodings for diffing. Lists of containers (hands, deck,
+    discard pile, ...) are encoded per item so one changed hand does not
+    resend the others.
+    """
+    encoded: Dict[str, Any] = {}
+    for key, value in data.items():
+        if isinstance(value, list) and value and all(
+            isinstance(item, (list, dict)) for item in value
+        ):
+            encoded[key] = [orjson.dumps(item, option=orjson.OPT_SORT_KEYS) for item in value]
+        else:
+            encoded[key] = orjson.dumps(value, option=orjson.OPT_SORT_KEYS)
+    return encoded
+
+
+def _state_delta(
+    old: Dict[str, Any], new: Dict[str, Any], data: Dict[str, Any]
+) -> Dict[str, Any]:
+    # Multi-path PATCH body ("hands/2": [...], removed fields -> None).
+    updates: Dict[str, Any] = {}
+    for key, encoded in new.items():
+        before = old.get(key)
+        if before == encoded:
+            continue
+        if isinstance(encoded, list) and isinstance(before, list):
+            for i, item in enumerate(encoded):
+                if i >= len(before) or before[i] != item:
+                    updates[f"{key}/{i}"] = data[key][i]
+            for i in range(len(encoded), len(before)):
+                updates[f"{key}/{i}"] = None
+        else:
+            updates[key] = data[key]
+    for key in old.keys() - new.keys():
+        updates[key] = None
+    return updates
+
+
+def _persisted_fields(state: GameState) -> Dict[str, Any]:
+    # Keys starting with "_" are runtime-only caches; never persist them.
+    # Players are stored as columns (see pack_players), not a list of dicts.
+    data = {
+        key: value
+        for key, value in state.items()
+        if not key.startswith("_") and key not in _UNDIFFED_KEYS
+    }
+    data.update(pack_players(state))
+    return data
+
+
+def save_game_state(room_id: str, state: GameState, full: bool = False) -> None:
+    data = _persisted_fields(state)
+
+    # Diff against what this session last persisted and send only the
+    # changed fields; identical content is not written at all.
+    encoded = _field_encodings(data)
+    baseline_key = f"_persisted_{room_id}"
+    baseline = None if full else st.session_state.get(baseline_key)
+    updates = None if baseline is None else _state_delta(baseline, encoded, data)
+    if updates == {}:
+        return
+    st.session_state[baseline_key] = encoded
+
+    # Only write if nobody wrote since the version we loaded; a lost race
+    # surfaces in _check_failed_write.
+    base_version = state.get("version", 0)
+    bump_version(state, _get_viewer_id())
+    _local_states()[room_id] = state
+    data["version"] = state["version"]
+    data["last_writer"] = state["last_writer"]
+    path = _game_state_path(room_id)
+    if updates is None:
+        # No baseline yet (first save in this session): full write.
+        fb_cas_put(path, data, base_version)
+    else:
+        updates["version"] = state["version"]
+        updates["last_writer"] = state["last_writer"]
+        fb_cas_patch(path, updates, base_version)
+    # Later reads in this run see what was just written, without a round trip.
+    _run_cache()[path] = data
+
+
+def mark_dirty(room_id: str, state: GameState) -> None:
+    """
+    Record that `state` changed this run. The single full write happens in
+    flush_game_state() when render_room_game finishes (or reruns).
+    """
+    st.session_state["_dirty_state"] = (room_id, state)
+
+
+def flush_game_state() -> None:
+    dirty = st.session_state.pop("_dirty_state", None)
+    if dirty is not None:
+        save_game_state(*dirty)
+
+
+def patch_game_state(
+    room_id: str,
+    state: GameState,
+    updates: Dict[str, Any],
+    conditional: bool = True,
+) -> None:
+    """
+    Persist only the fields an action changed. Keys are paths relative to the
+    game state (e.g. "hands/2/1"); Firebase applies them as a single
+    multi-path update, so a one-card change costs bytes instead of the full
+    state. Like save_game_state, the update is dropped if someone wrote since
+    the version we loaded; pass conditional=False only for writes confined to
+    the viewer's own entries, which cannot clobber anyone else's move.
+    """
+    base_version = state.get("version", 0)
+    bump_version(state, _get_viewer_id())
+    _local_states()[room_id] = state
+    updates = {
+        **updates,
+        "version": state["version"],
+        "last_writer": state["last_writer"],
+    }
+    path = _game_state_path(room_id)
+    if conditional:
+        fb_cas_patch(path, updates, base_version)
+    else:
+        fb_patch(path, updates)
+    _run_cache().pop(path, None)
+
+    # Bring the save_game_state diff baseline up to date for the fields just
+    # sent, so the next full save does not resend them.
+    baseline = st.session_state.get(f"_persisted_{room_id}")
+    if baseline is not None:
+        touched = {key.split("/", 1)[0] for key in updates} - _UNDIFFED_KEYS
+        data = _persisted_fields(state)
+        baseline.update(
+            _field_encodings({key: data[key] for key in touched if key in data})
+        )
+        for key in touched - data.keys():
+            baseline.pop(key, None)
+
+
+def _check_failed_write(room_id: str) -> None:
+    error = take_failed_write()
+    if error is not None:
+        # The optimistic copy never reached Firebase; fall back to the server
+        # and let this rerun recompute from there.
+        _local_states().pop(room_id, None)
+        st.session_state.pop(f"_persisted_{room_id}", None)
+        if isinstance(error, FirebaseConflict):
+            st.warning("Another player moved first. Showing the latest game state.")
+        else:
+            st.warning("Your last move could not be saved. Showing the latest game state.")
 
 
-def save_game_state(room_id: str, state: GameState) -> None:
-    fb_put(_game_state_path(room_id), state)
+def _turn_end_updates(state: GameState) -> Dict[str, Any]:
+    # Fields touched by every discard + advance_turn at the end of a turn.
+    # The pile only ever grows by one card, so only that entry is sent.
+    pile = state["discard_pile"]
+    return {
+        f"discard_pile/{len(pile) - 1}": pile[-1],
+        "top_discard": state["top_discard"],
+        "drawn_card": None,
+        "current_player_id": state["current_player_id"],
+    }
 
 
 def _load_room(room_id: str) -> Optional[Dict[str, Any]]:
-    return fb_get(f"/rooms/{room_id}")
+    return _cached_fb_get(f"/rooms/{room_id}")
 
 
 def _room_players_list(room: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -53,21 +290,33 @@ def _room_players_list(room: Dict[str, Any]) -> List[Dict[str, Any]]:
     return room_players
 
 
-def ensure_game_state(room_id: str) -> Optional[GameState]:
+def ensure_game_state(
+    room_id: str, room: Optional[Dict[str, Any]] = None
+) -> Optional[GameState]:
     """
     Load existing GameState from Firebase, or create + deal hands if missing.
-    Also ensures peek-related helpers exist.
+    Also ensures peek-related helpers exist. Pass the already-fetched `room`
+    to read game_state from it instead of issuing more GETs.
     """
-    state = load_game_state(room_id)
+    state = load_game_state(room_id, room)
     if state:
-        # Backwards-compatibility: ensure peek helpers exist
-        if "peek_ready" not in state:
-            state["peek_ready"] = {p["id"]: False for p in state["players"]}
+        # Backwards-compatibility: migrate missing peek helpers once, so the
+        # renderers can rely on them without re-checking every rerun.
+        migrated: Dict[str, Any] = {}
         if "peeks_used" not in state:
-            state["peeks_used"] = {p["id"]: 0 for p in state["players"]}
+            migrated["peeks_used"] = {p["id"]: 0 for p in state["players"]}
+        if state.pop("_legacy_layout", False):
+            # Full write in the column layout; the PUT also drops the old
+            # players list.
+            state.update(migrated)
+            save_game_state(room_id, state, full=True)
+        elif migrated:
+            state.update(migrated)
+            patch_game_state(room_id, state, migrated)
         return state
 
-    room = _load_room(room_id)
+    if room is None:
+        room = _load_room(room_id)
     if not room:
         return None
 
@@ -79,14 +328,34 @@ def ensure_game_state(room_id: str) -> Optional[GameState]:
     state = create_game_state(max_players=max_players, room_players=room_players)
     deal_initial_hands(state)
 
-    # Simultaneous peek-phase helpers
-    state["peek_ready"] = {p["id"]: False for p in state["players"]}
+    # Simultaneous peek-phase helpers ({player_id: True} once ready)
+    state["peek_ready"] = {}
     state["peeks_used"] = {p["id"]: 0 for p in state["players"]}
 
     save_game_state(room_id, state)
     return state
 
 
+# ---------- Widget keys & labels ----------
+
+
+@lru_cache(maxsize=1024)
+def _card_keys(prefix: str, player_id: str, n: int) -> Tuple[str, ...]:
+    # Per-card widget keys, formatted once per (prefix, player, hand size)
+    # instead of on every rerun.
+    return tuple(f"{prefix}_{player_id}_{i}" for i in range(n))
+
+
+@lru_cache(maxsize=64)
+def _face_down_row(n: int) -> str:
+    return " ".join(["🂠"] * n) + f"  · {n} card{'s' if n != 1 else ''}"
+
+
+@lru_cache(maxsize=64)
+def _card_texts(template: str, n: int) -> Tuple[str, ...]:
+    return tuple(template.format(i + 1) for i in range(n))
+
+
 # ---------- Layout helpers (radial board) ----------
 
 POSITIONS_BY_N = {
@@ -114,13 +383,6 @@ def _get_viewer_id() -> Optional[str]:
     return st.session_state.get("player_id")
 
 
-def _get_player_index_by_id(state: GameState, player_id: str) -> Optional[int]:
-    for idx, player in enumerate(state["players"]):
-        if player["id"] == player_id:
-            return idx
-    return None
-
-
 def _get_perspective_order(state: GameState, viewer_id: Optional[str]) -> List[int]:
     """
     Returns list of indices into state["players"], starting from viewer on top,
@@ -132,24 +394,22 @@ def _get_perspective_order(state: GameState, viewer_id: Optional[str]) -> List[i
 
     start_idx = 0
     if viewer_id:
-        idx = _get_player_index_by_id(state, viewer_id)
+        idx = find_player_index(state, viewer_id)
         if idx is not None:
             start_idx = idx
 
-    order: List[int] = []
-    for i in range(n):
-        order.append((start_idx + i) % n)
-    return order
+    return list(range(start_idx, n)) + list(range(start_idx))
 
 
 def _render_center_piles(state: GameState) -> None:
-    deck_size = len(state.get("deck", []))
+    deck_size = deck_remaining(state)
     st.markdown("### Center")
     st.write(f"Deck: **{deck_size}** cards remaining")
 
-    discard = state.get("discard_pile", []) or []
-    if discard:
-        top_card: Card = discard[-1]
+    top_card: Optional[Card] = state.get("top_discard")
+    if top_card is None and state.get("discard_pile"):
+        top_card = state["discard_pile"][-1]
+    if top_card is not None:
         st.write(f"Discard top: **{card_label(top_card)}**")
     else:
         st.write("Discard pile: *(empty)*")
@@ -197,56 +457,65 @@ def _render_player_box(
 
     st.markdown(f"**{label}{badge}**")
 
-    # Safety: ensure helpers exist
-    if "peeks_used" not in state:
-        state["peeks_used"] = {p["id"]: 0 for p in state["players"]}
-    if "peek_ready" not in state:
-        state["peek_ready"] = {p["id"]: False for p in state["players"]}
-
     hand = player.get("hand", [])
-    cols = st.columns(len(hand)) if hand else []
-
-    for i, card in enumerate(hand):
-        with cols[i]:
-            if phase == "pre_peek":
-                if is_viewer:
-                    # Your 4 cards are clickable, up to 2 peeks
-                    used = state["peeks_used"].get(pid, 0)
-                    disabled = used >= 2
-                    if st.button(
-                        f"Card {i + 1}",
-                        key=f"peek_card_button_{pid}_{i}",
-                        disabled=disabled,
-                    ):
-                        st.info(f"Card {i + 1}: **{card_label(card)}**")
-                        state["peeks_used"][pid] = used + 1
-                        save_game_state(room_id, state)
-                        st.rerun()
-                else:
-                    # Other players' cards: visible as face-down but not clickable
-                    st.button(
-                        f"Card {i + 1}",
-                        key=f"card_{pid}_{i}",
-                        disabled=True,
+
+    if phase == "pre_peek" and is_viewer and hand:
+        # Your cards are selectable, up to 2 peeks; picks are submitted
+        # together, so several peeks cost one rerun and one write.
+        labels = _card_texts("Card {}", len(hand))
+        keys = _card_keys("peek_card", pid, len(hand))
+        used = state["peeks_used"].get(pid, 0)
+        disabled = used >= 2
+        with st.form(f"peek_form_{pid}", clear_on_submit=True):
+            cols = st.columns(len(hand))
+            checked = []
+            for i in range(len(hand)):
+                with cols[i]:
+                    # A card already seen cannot be peeked at again.
+                    checked.append(
+                        st.checkbox(
+                            labels[i],
+                            key=keys[i],
+                            disabled=disabled or is_peeked(state, pid, i),
+                        )
                     )
-            else:
-                # Non-peek phases: all cards are just face-down placeholders here
-                st.button(
-                    f"Card {i + 1}",
-                    key=f"card_{pid}_{i}",
-                    disabled=True,
+            submitted = st.form_submit_button("Reveal peeks", disabled=disabled)
+        if submitted:
+            picks = [i for i, on in enumerate(checked) if on][: 2 - used]
+            for i in picks:
+                st.info(f"{labels[i]}: **{card_label(hand[i])}**")
+                mark_peeked(state, pid, i)
+            if picks:
+                state["peeks_used"][pid] = used + len(picks)
+                patch_game_state(
+                    room_id,
+                    state,
+                    {
+                        f"peeks_used/{pid}": state["peeks_used"][pid],
+                        # Only our own entry: everyone peeks at once.
+                        f"peeked_cards/{pid}": state["peeked_cards"][pid],
+                    },
+                    conditional=False,
                 )
+    elif hand:
+        # Everyone else's cards (and all cards outside the peek phase) are
+        # face-down placeholders: one markdown row instead of disabled buttons.
+        st.markdown(_face_down_row(len(hand)))
 
     # Under YOUR cards: Ready button in peek phase
     if phase == "pre_peek" and is_viewer:
         used = state["peeks_used"].get(pid, 0)
-        ready = state["peek_ready"].get(pid, False)
+        ready = bool((state.get("peek_ready") or {}).get(pid))
         st.caption(f"Peek used: **{used}/2**")
 
         if not ready:
             if st.button("I'm ready (done peeking)", key=f"peek_ready_{pid}"):
-                state["peek_ready"][pid] = True
-                save_game_state(room_id, state)
+                state["peek_ready"] = {**(state.get("peek_ready") or {}), pid: True}
+                # Only our own child is written, and writing True twice is
+                # harmless, so simultaneous or repeated clicks cannot clash.
+                patch_game_state(
+                    room_id, state, {f"peek_ready/{pid}": True}, conditional=False
+                )
                 st.rerun()
         else:
             st.success("You are ready! Waiting for other players…")
@@ -306,28 +575,21 @@ def render_pre_peek(state: GameState, room_id: str) -> None:
     Simultaneous peek phase:
 
     - All players see full board with all cards face-down.
-    - Each player can click ONLY their own 4 cards (up to 2 peeks).
+    - Each player can pick ONLY their own 4 cards (up to 2 peeks).
     - Each player has an "I'm ready" button under their own cards.
     - Game advances to 'playing' only when EVERY player is ready.
     - No auto-refresh here, to avoid constant flicker/lag.
     """
     st.header("Kaboom — Peek Phase")
 
-    # Ensure helper structures exist
-    if "peek_ready" not in state:
-        state["peek_ready"] = {p["id"]: False for p in state["players"]}
-    if "peeks_used" not in state:
-        state["peeks_used"] = {p["id"]: 0 for p in state["players"]}
-    save_game_state(room_id, state)
-
     viewer_id = _get_viewer_id()
     if not viewer_id:
         st.warning("You are not recognized as a player in this room.")
         return
 
     st.info(
-        "Peek Phase: You may click **up to 2** of your own face-down cards to see them "
-        "temporarily. When you're done, click **\"I'm ready (done peeking)\"** under "
+        "Peek Phase: You may select **up to 2** of your own face-down cards and "
+        "reveal them temporarily. When you're done, click **\"I'm ready (done peeking)\"** under "
         "your cards. The game will start once **everyone** is ready."
     )
 
@@ -336,17 +598,15 @@ def render_pre_peek(state: GameState, room_id: str) -> None:
 
     # Ready summary
     total_players = len(state["players"])
-    ready_count = sum(1 for p in state["players"] if state["peek_ready"].get(p["id"]))
+    ready = state.get("peek_ready") or {}
+    ready_count = sum(1 for player in state["players"] if ready.get(player["id"]))
     st.markdown("---")
     st.caption(f"Ready players: **{ready_count}/{total_players}**")
 
     # Transition to playing when ALL ready
-    all_ready = all(
-        state["peek_ready"].get(p["id"], False) for p in state["players"]
-    )
-    if all_ready:
+    if ready_count == total_players:
         state["phase"] = "playing"
-        save_game_state(room_id, state)
+        mark_dirty(room_id, state)
         st.rerun()
 
 
@@ -363,33 +623,107 @@ def _render_kaboom_button(state: GameState, room_id: str) -> None:
         state["phase"] = "kaboom"
         state["kaboom_caller_id"] = viewer_id
         # Mark caller as out & revealed
-        for p in state["players"]:
-            if p["id"] == viewer_id:
-                p["active"] = False
-                p["revealed"] = True
-                break
-        save_game_state(room_id, state)
+        caller = find_player(state, viewer_id)
+        if caller:
+            set_player_active(state, viewer_id, False)
+            caller["revealed"] = True
+        mark_dirty(room_id, state)
         st.rerun()
 
 
+def _on_draw(state: GameState, room_id: str) -> None:
+    reshuffled = deck_remaining(state) == 0
+    state["drawn_card"] = draw_from_deck(state)
+    updates = {"drawn_card": state["drawn_card"], "deck_top": state["deck_top"]}
+    if reshuffled:
+        updates["deck"] = state["deck"]
+    patch_game_state(room_id, state, updates)
+
+
+def _on_replace(state: GameState, room_id: str, player_id: str, i: int) -> None:
+    player_idx = find_player_index(state, player_id)
+    hand = state["players"][player_idx]["hand"]
+    drawn = state["drawn_card"]
+    _push_discard(state, hand[i])
+    hand[i] = drawn
+    state["drawn_card"] = None
+    advance_turn(state)
+    updates = _turn_end_updates(state)
+    updates[f"hands/{player_idx}/{i}"] = drawn
+    patch_game_state(room_id, state, updates)
+
+
+def _on_discard(state: GameState, room_id: str) -> None:
+    _push_discard(state, state["drawn_card"])
+    state["drawn_card"] = None
+    advance_turn(state)
+    patch_game_state(room_id, state, _turn_end_updates(state))
+
+
+@st.fragment
+def _drawn_card_actions(state: GameState, room_id: str, player_id: str) -> None:
+    """
+    Draw / replace / discard controls for the current player. Clicks run
+    their callback and rerun only this fragment; the whole page reruns once
+    the turn has ended so the board catches up.
+    """
+    try:
+        if state.get("current_player_id") != player_id:
+            st.rerun()
+
+        drawn = state.get("drawn_card")
+        if drawn is None:
+            st.button("Draw card", on_click=_on_draw, args=(state, room_id))
+            return
+
+        st.info(f"You drew: **{card_label(drawn)}**")
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.markdown("**Replace one of your cards**")
+            hand: List[Card] = find_player(state, player_id).get("hand", [])
+            if hand:
+                replace_cols = st.columns(len(hand))
+                replace_labels = _card_texts("Replace card {}", len(hand))
+                replace_keys = _card_keys("replace", player_id, len(hand))
+                for i in range(len(hand)):
+                    with replace_cols[i]:
+                        st.button(
+                            replace_labels[i],
+                            key=replace_keys[i],
+                            on_click=_on_replace,
+                            args=(state, room_id, player_id, i),
+                        )
+
+        with col2:
+            st.markdown("**Discard drawn card**")
+            st.button("Discard card", on_click=_on_discard, args=(state, room_id))
+    finally:
+        # Fragment reruns skip render_room_game's commit; send callback writes.
+        commit_writes_async()
+
+
 def render_playing(state: GameState, room_id: str) -> None:
     st.header("Kaboom — Main Game")
 
     render_board_layout(state, phase="playing", room_id=room_id)
 
     viewer_id = _get_viewer_id()
-    players = state.get("players", [])
 
-    # Winner check (instant 0 cards)
-    winner_id = check_instant_win(state)
+    # Winner check (instant 0 cards); only scan hands when one may be empty.
+    # States saved before min_hand_len existed always run the check.
+    winner_id = None
+    if state.get("min_hand_len", 0) == 0:
+        winner_id = check_instant_win(state)
     if winner_id is not None:
         end_game_instant_win(state, winner_id)
-        save_game_state(room_id, state)
+        mark_dirty(room_id, state)
         st.rerun()
         return
 
     current_id = state.get("current_player_id")
-    current_player = next((p for p in players if p["id"] == current_id), None)
+    current_player = find_player(state, current_id)
 
     if not current_player:
         st.error("Current player not found.")
@@ -403,48 +737,7 @@ def render_playing(state: GameState, room_id: str) -> None:
     # This is the current viewer's turn
     st.subheader("Your turn")
 
-    drawn = state.get("drawn_card")
-
-    if drawn is None:
-        if st.button("Draw card"):
-            state["drawn_card"] = draw_from_deck(state)
-            save_game_state(room_id, state)
-            st.rerun()
-            return
-    else:
-        st.info(f"You drew: **{card_label(drawn)}**")
-
-        col1, col2 = st.columns(2)
-
-        with col1:
-            st.markdown("**Replace one of your cards**")
-            hand: List[Card] = current_player.get("hand", [])
-            if hand:
-                replace_cols = st.columns(len(hand))
-                for i, _card in enumerate(hand):
-                    with replace_cols[i]:
-                        if st.button(
-                            f"Replace card {i + 1}",
-                            key=f"replace_{current_id}_{i}",
-                        ):
-                            replaced = hand[i]
-                            state.setdefault("discard_pile", []).append(replaced)
-                            hand[i] = drawn
-                            state["drawn_card"] = None
-                            advance_turn(state)
-                            save_game_state(room_id, state)
-                            st.rerun()
-                            return
-
-        with col2:
-            st.markdown("**Discard drawn card**")
-            if st.button("Discard card"):
-                state.setdefault("discard_pile", []).append(drawn)
-                state["drawn_card"] = None
-                advance_turn(state)
-                save_game_state(room_id, state)
-                st.rerun()
-                return
+    _drawn_card_actions(state, room_id, current_id)
 
     st.markdown("---")
     st.markdown("### Kaboom")
@@ -458,7 +751,7 @@ def render_kaboom(state: GameState, room_id: str) -> None:
     st.header("Kaboom Called!")
 
     caller_id = state.get("kaboom_caller_id")
-    caller = next((p for p in state["players"] if p["id"] == caller_id), None)
+    caller = find_player(state, caller_id)
 
     if caller:
         st.subheader(f"{caller['name']} has called Kaboom and is now out of the game.")
@@ -466,10 +759,9 @@ def render_kaboom(state: GameState, room_id: str) -> None:
 
         hand: List[Card] = caller.get("hand", [])
         if hand:
-            cols = st.columns(len(hand))
-            for i, card in enumerate(hand):
-                with cols[i]:
-                    st.button(card_label(card), key=f"caller_{caller_id}_{i}")
+            # Display only (nothing is clickable), so one markdown row rather
+            # than a button widget per card.
+            st.markdown(" ".join(f"`{card_label(card)}`" for card in hand))
         else:
             st.caption("Caller has no cards.")
     else:
@@ -483,7 +775,7 @@ def render_kaboom(state: GameState, room_id: str) -> None:
     if st.button("Compute Final Scores"):
         compute_final_scores(state)
         state["phase"] = "game_over"
-        save_game_state(room_id, state)
+        mark_dirty(room_id, state)
         st.rerun()
 
 
@@ -494,7 +786,7 @@ def render_game_over(state: GameState, room_id: str) -> None:
     players = state.get("players", [])
 
     if instant_winner_id is not None:
-        winner = next((p for p in players if p["id"] == instant_winner_id), None)
+        winner = find_player(state, instant_winner_id)
         if winner:
             st.subheader(
                 f"Instant Win! {winner['name']} reached 0 cards and wins the game!"
@@ -502,17 +794,28 @@ def render_game_over(state: GameState, room_id: str) -> None:
         else:
             st.subheader("Instant Win (winner not found in player list).")
 
-        st.write("Final card counts:")
-        for player in players:
-            st.write(f"{player['name']}: {len(player.get('hand', []))} cards")
+        # One element for the whole list instead of one per player.
+        st.markdown(
+            "  \n".join(
+                ["Final card counts:"]
+                + [
+                    f"{player['name']}: {len(player.get('hand', []))} cards"
+                    for player in players
+                ]
+            )
+        )
     else:
         if not state.get("final_scores"):
             compute_final_scores(state)
-            save_game_state(room_id, state)
+            mark_dirty(room_id, state)
 
         st.subheader("Final Scores (lower is better):")
-        for rank, (pid, name, score) in enumerate(state["final_scores"], start=1):
-            st.write(f"{rank}. **{name}** — {score} points")
+        st.markdown(
+            "\n".join(
+                f"{rank}. **{name}** — {score} points"
+                for rank, (pid, name, score) in enumerate(state["final_scores"], start=1)
+            )
+        )
 
         if state.get("final_scores"):
             best_score = state["final_scores"][0][2]
@@ -530,16 +833,80 @@ def render_game_over(state: GameState, room_id: str) -> None:
     st.caption("To play again, the host can create a new room from the landing page.")
 
 
+# ---------- Live updates ----------
+
+
+def _room_listener(room_id: str) -> FirebaseListener:
+    # Same subscription the lobby used, so it survives the page switch.
+    return subscribe_room(room_id)
+
+
+def stop_room_listener(room_id: str) -> None:
+    unsubscribe_room(room_id)
+
+
+# Seconds between listener-queue checks per phase; phases not listed (peek,
+# game over) do not watch at all.
+WATCH_INTERVALS = {"playing": 0.5, "kaboom": 1.5}
+
+
+def _room_snapshot_key(room: Optional[Dict[str, Any]]) -> Tuple[Any, Any]:
+    # What a render depends on: the room status and the game-state version
+    # (bumped by every game write).
+    room = room or {}
+    return room.get("status"), (room.get("game_state") or {}).get("version")
+
+
+def _watch_room(room_id: str) -> None:
+    """
+    Cheap local check of the room listener's queue; only reruns the whole
+    app when Firebase actually pushed a change that advanced the room past
+    what this session last rendered (echoes of our own writes do not).
+    No network I/O happens here.
+    """
+    if not room_changed(room_id):
+        return
+    listener = _room_listener(room_id)
+    if listener.ready.is_set() and not listener.failed and _room_snapshot_key(
+        listener.value
+    ) == st.session_state.get(f"_rendered_version_{room_id}"):
+        return
+    st.rerun()
+
+
+def _install_room_watch(state: GameState, room_id: str, phase: str) -> None:
+    if phase == "game_over":
+        # Terminal phase: nothing else will change, so drop the subscription.
+        stop_room_listener(room_id)
+        return
+    interval = WATCH_INTERVALS.get(phase)
+    if interval is None:
+        return
+    if phase == "playing" and state.get("current_player_id") == _get_viewer_id():
+        # Only the current player can act during their turn; their own clicks
+        # drive reruns, so skip watching and discard our own write echoes.
+        _room_listener(room_id).drain()
+        return
+    st.fragment(_watch_room, run_every=interval)(room_id)
+
+
 # ---------- Top-level entry for game_page() ----------
 
 
-def render_room_game(room_id: str) -> None:
+def render_room_game(room_id: str, room: Optional[Dict[str, Any]] = None) -> None:
     """
     Main entry point for the game screen.
-    - Loads room & game_state from Firebase
-    - Auto-refreshes every 2 seconds ONLY after peek phase
+    - Loads room & game_state from Firebase (reuses `room` if the caller
+      already fetched it this run)
+    - Reruns on Firebase change events after the peek phase (phase-dependent)
     - Routes to the correct phase renderer
     """
+    # New script run: drop Firebase reads memoized by the previous one.
+    st.session_state["_fb_run_cache"] = {}
+    _check_failed_write(room_id)
+
+    if room is not None:
+        _run_cache()[f"/rooms/{room_id}"] = room
     room = _load_room(room_id)
     if not room:
         st.error("Room no longer exists.")
@@ -550,24 +917,33 @@ def render_room_game(room_id: str) -> None:
         st.warning("Game has not started yet or room is no longer active.")
         return
 
-    state = ensure_game_state(room_id)
+    state = ensure_game_state(room_id, room)
     if not state:
         st.error("Unable to initialize game state.")
         return
 
     phase = state.get("phase", "pre_peek")
 
-    # 🔄 Auto-refresh ONLY after peek, for live turns/reactions
-    if phase != "pre_peek":
-        st_autorefresh(interval=2000, key=f"game_autorefresh_{room_id}")
-
-    if phase == "pre_peek":
-        render_pre_peek(state, room_id)
-    elif phase == "playing":
-        render_playing(state, room_id)
-    elif phase == "kaboom":
-        render_kaboom(state, room_id)
-    elif phase == "game_over":
-        render_game_over(state, room_id)
-    else:
-        st.error(f"Unknown game phase: {phase}")
\ No newline at end of file
+    # 🔄 Live updates after peek, at a phase-dependent rate
+    _install_room_watch(state, room_id, phase)
+
+    try:
+        if phase == "pre_peek":
+            render_pre_peek(state, room_id)
+        elif phase == "playing":
+            render_playing(state, room_id)
+        elif phase == "kaboom":
+            render_kaboom(state, room_id)
+        elif phase == "game_over":
+            render_game_over(state, room_id)
+        else:
+            st.error(f"Unknown game phase: {phase}")
+    finally:
+        # One write per run, also when a renderer calls st.rerun(); sent in
+        # the background so the rerun is not blocked on Firebase.
+        flush_game_state()
+        commit_writes_async()
+        st.session_state[f"_rendered_version_{room_id}"] = (
+            status,
+            state.get("version"),
+        )
\ No newline at end of file
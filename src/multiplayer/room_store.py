@@ -1,7 +1,21 @@
 # room_store.py
+import heapq
+import time
 from typing import Any, Dict, List, Optional
 
-from src.firebase.firebase_client import fb_get, fb_patch, fb_post, fb_put, current_timestamp
+import requests
+import streamlit as st
+
+from src.firebase.firebase_client import (
+    FirebaseListener,
+    fb_get,
+    fb_get_with_etag,
+    fb_patch,
+    fb_post,
+    fb_put,
+    fb_put_if_match,
+    current_timestamp,
+)
 
 
 # Data model (stored under /rooms/<room_id> in RTDB)
@@ -19,23 +33,79 @@ from src.firebase.firebase_client import fb_get, fb_patch, fb_post, fb_put, curr
 #       ...
 #   }
 # }
+#
+# Each room also has a small denormalized listing entry, kept in step with
+# the room by every write below, so the landing page never downloads player
+# subtrees (queried by status; ".indexOn": ["status"] on /rooms_summary in
+# the rules lets the server do the filtering):
+# /rooms_summary/<room_id> = {status, max_players, player_count, room_name,
+#                             host_name, created_at}
+
+
+def _summary_path(room_id: str) -> str:
+    return f"/rooms_summary/{room_id}"
+
+
+def _summary_of(room: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "status": room.get("status", "open"),
+        "max_players": room.get("max_players", 0),
+        "player_count": len(room.get("players") or {}),
+        "room_name": room.get("room_name", "Unnamed"),
+        "host_name": room.get("host_name", "Host"),
+        "created_at": room.get("created_at", 0.0),
+    }
+
+
+# Set once this process has backfilled summaries for rooms created before
+# /rooms_summary existed.
+_SUMMARIES_BACKFILLED = False
+
+
+def _backfill_summaries() -> None:
+    global _SUMMARIES_BACKFILLED
+    if _SUMMARIES_BACKFILLED:
+        return
+    rooms = fb_get("/rooms") or {}
+    existing = fb_get("/rooms_summary", params={"shallow": "true"}) or {}
+    missing = {
+        room_id: _summary_of(room)
+        for room_id, room in rooms.items()
+        if room and room_id not in existing and room.get("status", "open") == "open"
+    }
+    if missing:
+        fb_patch("/rooms_summary", missing)
+    _SUMMARIES_BACKFILLED = True
 
 
 def create_room(room_name: str, max_players: int, host_id: str, host_name: str) -> str:
+    now = current_timestamp()
     data = {
         "room_name": room_name,
         "max_players": max_players,
         "status": "open",
         "host_name": host_name,
-        "created_at": current_timestamp(),
+        "created_at": now,
         "players": {
             host_id: {
                 "name": host_name,
-                "joined_at": current_timestamp(),
+                "joined_at": now,
             }
         },
     }
     room_id = fb_post("/rooms", data)
+    fb_put(
+        _summary_path(room_id),
+        {
+            "status": "open",
+            "max_players": max_players,
+            "player_count": 1,
+            "room_name": room_name,
+            "host_name": host_name,
+            "created_at": now,
+        },
+    )
+    _fetch_rooms_raw.clear()
     return room_id
 
 
@@ -44,36 +114,128 @@ def get_room(room_id: str) -> Optional[Dict[str, Any]]:
     return room
 
 
+def subscribe_room(room_id: str) -> FirebaseListener:
+    """
+    This session's streaming subscription to /rooms/<room_id>, created on
+    first use and shared by the lobby and game pages.
+    """
+    key = f"listener_{room_id}"
+    listener = st.session_state.get(key)
+    if listener is None or not (listener.alive or listener.failed):
+        # First use, or the previous one stopped after sitting idle.
+        listener = st.session_state[key] = FirebaseListener(f"/rooms/{room_id}")
+    listener.touch()
+    return listener
+
+
+def unsubscribe_room(room_id: str) -> None:
+    listener = st.session_state.pop(f"listener_{room_id}", None)
+    if listener is not None:
+        listener.stop()
+
+
+def cached_room(room_id: str) -> Optional[Dict[str, Any]]:
+    """
+    The room as last pushed by its subscription; falls back to a GET until
+    the initial snapshot has arrived. Treat the result as read-only.
+    """
+    listener = subscribe_room(room_id)
+    if listener.ready.is_set() and not listener.failed:
+        return listener.value
+    return get_room(room_id)
+
+
+# Seconds between forced reruns while a room's stream is unavailable.
+FALLBACK_POLL_INTERVAL = 2.0
+
+
+def room_changed(room_id: str) -> bool:
+    """
+    Whether the room changed since the last call. Normally this drains the
+    subscription's queue (no network I/O); if Firebase cancelled the stream
+    it reports a change every FALLBACK_POLL_INTERVAL instead, so callers
+    degrade to periodic reruns.
+    """
+    listener = subscribe_room(room_id)
+    if not listener.failed:
+        return listener.drain()
+    key = f"_room_poll_{room_id}"
+    now = time.monotonic()
+    if now - st.session_state.get(key, 0.0) < FALLBACK_POLL_INTERVAL:
+        return False
+    st.session_state[key] = now
+    return True
+
+
+# Most open rooms the landing page lists.
+OPEN_ROOMS_LIMIT = 50
+
+# Tries for a conditional write before giving up on a contended room.
+WRITE_ATTEMPTS = 3
+
+# Cleared once Firebase rejects the status query (no ".indexOn" rule), after
+# which this process filters the summaries itself.
+_STATUS_INDEXED = True
+
+
+def _query_open_summaries() -> Dict[str, Any]:
+    global _STATUS_INDEXED
+    if _STATUS_INDEXED:
+        try:
+            return fb_get(
+                "/rooms_summary", params={"orderBy": '"status"', "equalTo": '"open"'}
+            ) or {}
+        except requests.HTTPError as exc:
+            if exc.response is None or exc.response.status_code != 400:
+                raise
+            _STATUS_INDEXED = False
+    summaries = fb_get("/rooms_summary") or {}
+    return {
+        room_id: summary
+        for room_id, summary in summaries.items()
+        if summary and summary.get("status") == "open"
+    }
+
+
+@st.cache_data(ttl=2, show_spinner=False)
+def _fetch_rooms_raw() -> Dict[str, Any]:
+    # Shared by every session: lobby visitors within 2s reuse one query.
+    # Room writes below clear it so this process sees its own changes at once.
+    _backfill_summaries()
+    return _query_open_summaries()
+
+
 def list_open_rooms() -> List[Dict[str, Any]]:
     """
     Returns list like:
     [
-      {"id": "<room_id>", "room_name": ..., "max_players": ..., "status": ..., "players": {...}},
+      {"id": "<room_id>", "room_name": ..., "max_players": ..., "status": ...,
+       "player_count": int, "host_name": ..., "created_at": ...},
       ...
     ]
+    at most OPEN_ROOMS_LIMIT entries, oldest first.
     """
-    rooms = fb_get("/rooms") or {}
-    result = []
-    for room_id, room in rooms.items():
-        if not room:
-            continue
-        status = room.get("status", "open")
-        players = room.get("players", {}) or {}
-        max_players = room.get("max_players", 0)
-        # Show rooms that are still open and not full
-        if status == "open" and len(players) < max_players:
-            result.append(
-                {
-                    "id": room_id,
-                    **room,
-                }
-            )
-    # Sort by created_at (oldest first)
-    result.sort(key=lambda r: r.get("created_at", 0.0))
-    return result
+    rooms = _fetch_rooms_raw()
+    # The query already returns open rooms only; drop the full ones.
+    candidates = (
+        (room_id, room)
+        for room_id, room in rooms.items()
+        if room and room.get("player_count", 0) < room.get("max_players", 0)
+    )
+    # Only the oldest few are rendered, so avoid sorting the whole listing.
+    top = heapq.nsmallest(
+        OPEN_ROOMS_LIMIT, candidates, key=lambda kv: kv[1].get("created_at", 0.0)
+    )
+    return [{"id": room_id, **room} for room_id, room in top]
+
+
+def _increment(delta: int) -> Dict[str, Any]:
+    # Server-side increment: concurrent joins/leaves cannot lose an update.
+    return {".sv": {"increment": delta}}
 
 
 def join_room(room_id: str, player_id: str, player_name: str) -> bool:
+    now = current_timestamp()
     room = get_room(room_id)
     if not room:
         return False
@@ -82,22 +244,31 @@ def join_room(room_id: str, player_id: str, player_name: str) -> bool:
     if status != "open":
         return False
 
-    players = room.get("players", {}) or {}
     max_players = room.get("max_players", 0)
+    path = f"/rooms/{room_id}/players"
 
-    # Already in room?
-    if player_id in players:
-        return True
+    # Conditional write on the players map, so two players racing for the
+    # last seat cannot both get in (the loser re-reads and re-checks).
+    for _ in range(WRITE_ATTEMPTS):
+        players, etag = fb_get_with_etag(path)
+        players = players or {}
 
-    if len(players) >= max_players:
-        return False
+        # Already in room?
+        if player_id in players:
+            return True
 
-    players[player_id] = {
-        "name": player_name,
-        "joined_at": current_timestamp(),
-    }
-    fb_put(f"/rooms/{room_id}/players", players)
-    return True
+        if len(players) >= max_players:
+            return False
+
+        players[player_id] = {
+            "name": player_name,
+            "joined_at": now,
+        }
+        if fb_put_if_match(path, players, etag):
+            fb_patch(_summary_path(room_id), {"player_count": _increment(1)})
+            _fetch_rooms_raw.clear()
+            return True
+    return False
 
 
 def leave_room(room_id: str, player_id: str) -> None:
@@ -106,15 +277,21 @@ def leave_room(room_id: str, player_id: str) -> None:
         return
     players = room.get("players", {}) or {}
     if player_id in players:
-        del players[player_id]
-        fb_put(f"/rooms/{room_id}/players", players)
+        # Delete just this child instead of rewriting the whole players map.
+        fb_put(f"/rooms/{room_id}/players/{player_id}", None)
+        fb_patch(_summary_path(room_id), {"player_count": _increment(-1)})
 
-    # If room becomes empty, close it
-    if not players:
+    # If room becomes empty, close it (and drop it from the listing). Decide
+    # on a fresh read taken after our delete (fb_get sends queued writes
+    # first), so two players leaving at once cannot both miss it.
+    if not fb_get(f"/rooms/{room_id}/players"):
         fb_patch(f"/rooms/{room_id}", {"status": "closed"})
+        fb_put(_summary_path(room_id), None)
+    _fetch_rooms_raw.clear()
 
 
 def start_game(room_id: str) -> bool:
+    now = current_timestamp()
     room = get_room(room_id)
     if not room:
         return False
@@ -126,11 +303,20 @@ def start_game(room_id: str) -> bool:
     if len(players) < max_players:
         return False
 
-    fb_patch(
-        f"/rooms/{room_id}",
-        {
-            "status": "started",
-            "started_at": current_timestamp(),
-        },
-    )
+    # Flip the status only if it is still "open" at write time.
+    path = f"/rooms/{room_id}/status"
+    for _ in range(WRITE_ATTEMPTS):
+        status, etag = fb_get_with_etag(path)
+        if status == "started":
+            return True
+        if (status or "open") != "open":
+            return False
+        if fb_put_if_match(path, "started", etag):
+            break
+    else:
+        return False
+
+    fb_patch(f"/rooms/{room_id}", {"started_at": now})
+    fb_patch(_summary_path(room_id), {"status": "started"})
+    _fetch_rooms_raw.clear()
     return True
@@ -1,22 +1,32 @@
 # views.py
-import uuid
+import secrets
 import streamlit as st
-from streamlit_autorefresh import st_autorefresh
-from src.game.phases import render_room_game
+from src.game.phases import render_room_game, stop_room_listener
 from src.multiplayer.room_store import (
+    cached_room,
     create_room,
     list_open_rooms,
     get_room,
     join_room,
     leave_room,
+    room_changed,
     start_game,
+    unsubscribe_room,
 )
+from src.utils import clear_session_memo, session_memo
+
+# Per-session TTL (seconds) for the open-room listing; writes below clear it.
+OPEN_ROOMS_TTL = 2.0
+
+# Seconds between checks of the lobby subscription's queue (no network I/O).
+LOBBY_WATCH_INTERVAL = 0.2
 
 
 def ensure_identity():
     """Create a simple per-tab identity using session_state."""
     if "player_id" not in st.session_state:
-        st.session_state.player_id = str(uuid.uuid4())
+        # Only ever compared for equality, never shown: 64 random bits suffice.
+        st.session_state.player_id = secrets.token_hex(8)
     if "player_name" not in st.session_state:
         st.session_state.player_name = ""
     if "current_room_id" not in st.session_state:
@@ -27,6 +37,45 @@ def ensure_identity():
         st.session_state.is_host = False
 
 
+@st.fragment
+def _open_rooms_fragment():
+    # Join clicks rerun only this list; a successful join reruns the app.
+    rooms = session_memo("open_rooms", OPEN_ROOMS_TTL, list_open_rooms)
+    if not rooms:
+        st.caption("No open rooms available right now. Create one above!")
+    else:
+        for room in rooms:
+            room_id = room["id"]
+            room_name = room.get("room_name", "Unnamed")
+            max_players = room.get("max_players", 0)
+            player_count = room.get("player_count", 0)
+            host_name = room.get("host_name", "Host")
+
+            cols = st.columns([3, 2, 2, 2])
+            with cols[0]:
+                st.markdown(f"**{room_name}**")
+                st.caption(f"Host: {host_name}")
+            with cols[1]:
+                st.write(f"Players: {player_count}/{max_players}")
+            with cols[2]:
+                st.caption(f"Room ID: `{room_id[:6]}...`")
+            with cols[3]:
+                if st.button("Join", key=f"join_{room_id}"):
+                    ok = join_room(
+                        room_id=room_id,
+                        player_id=st.session_state.player_id,
+                        player_name=st.session_state.player_name.strip(),
+                    )
+                    clear_session_memo()
+                    if not ok:
+                        st.error("Unable to join room (maybe it's full or already started).")
+                    else:
+                        st.session_state.current_room_id = room_id
+                        st.session_state.is_host = False
+                        st.session_state.page = "lobby"
+                        st.rerun()
+
+
 def landing_page():
     st.header("Kaboom 🎮 — Multiplayer Lobby (No Game Yet)")
 
@@ -65,6 +114,7 @@ def landing_page():
                 host_id=st.session_state.player_id,
                 host_name=st.session_state.player_name.strip(),
             )
+            clear_session_memo()
             st.session_state.current_room_id = room_id
             st.session_state.is_host = True
             st.session_state.page = "lobby"
@@ -73,39 +123,15 @@ def landing_page():
     st.markdown("---")
     st.markdown("### Join an Open Room")
 
-    rooms = list_open_rooms()
-    if not rooms:
-        st.caption("No open rooms available right now. Create one above!")
-    else:
-        for room in rooms:
-            room_id = room["id"]
-            room_name = room.get("room_name", "Unnamed")
-            max_players = room.get("max_players", 0)
-            players = room.get("players", {}) or {}
-            host_name = room.get("host_name", "Host")
+    _open_rooms_fragment()
 
-            cols = st.columns([3, 2, 2, 2])
-            with cols[0]:
-                st.markdown(f"**{room_name}**")
-                st.caption(f"Host: {host_name}")
-            with cols[1]:
-                st.write(f"Players: {len(players)}/{max_players}")
-            with cols[2]:
-                st.caption(f"Room ID: `{room_id[:6]}...`")
-            with cols[3]:
-                if st.button("Join", key=f"join_{room_id}"):
-                    ok = join_room(
-                        room_id=room_id,
-                        player_id=st.session_state.player_id,
-                        player_name=st.session_state.player_name.strip(),
-                    )
-                    if not ok:
-                        st.error("Unable to join room (maybe it's full or already started).")
-                    else:
-                        st.session_state.current_room_id = room_id
-                        st.session_state.is_host = False
-                        st.session_state.page = "lobby"
-                        st.rerun()
+
+@st.fragment(run_every=LOBBY_WATCH_INTERVAL)
+def _lobby_watch(room_id: str):
+    # Renders nothing: checks the room subscription's local event queue and
+    # reruns the page only when Firebase pushed a change.
+    if room_changed(room_id):
+        st.rerun()
 
 
 def lobby_page():
@@ -119,13 +145,13 @@ def lobby_page():
             st.rerun()
         return
 
-    # Auto-refresh lobby every 2 seconds
-    st_autorefresh(interval=2000, key="lobby_autorefresh")
+    _lobby_watch(room_id)
 
-    room = get_room(room_id)
+    room = cached_room(room_id)
     if not room:
         st.error("Room no longer exists.")
         if st.button("Back to landing"):
+            unsubscribe_room(room_id)
             st.session_state.current_room_id = None
             st.session_state.page = "landing"
             st.rerun()
@@ -165,7 +191,9 @@ def lobby_page():
 
     with col1:
         if st.button("Leave Room"):
+            unsubscribe_room(room_id)
             leave_room(room_id, st.session_state.player_id)
+            clear_session_memo()
             st.session_state.current_room_id = None
             st.session_state.is_host = False
             st.session_state.page = "landing"
@@ -180,6 +208,7 @@ def lobby_page():
                 disabled_text = " (waiting for room to be full)"
             if st.button(f"Start Game{disabled_text}", disabled=not can_start):
                 ok = start_game(room_id)
+                clear_session_memo()
                 if not ok:
                     st.error("Cannot start game yet. Room must be full.")
                 else:
@@ -201,21 +230,20 @@ def game_page():
             st.rerun()
         return
 
-    # ❌ REMOVE autorefresh here
-    # st_autorefresh(interval=2000, key=f"wait_for_start_{room_id}")
-
     room = get_room(room_id)
-    status = room.get("status", "open")
+    status = room.get("status", "open") if room else "closed"
 
     if status != "started":
         st.warning("Waiting for host to start the game...")
         return
 
     # >>> THE ACTUAL GAME UI <<<
-    render_room_game(room_id)
+    # Hand over the room we just fetched so it is not read twice per rerun.
+    render_room_game(room_id, room=room)
 
     st.markdown("---")
     if st.button("Leave Game & Room"):
+        stop_room_listener(room_id)
         leave_room(room_id, st.session_state.player_id)
         st.session_state.current_room_id = None
         st.session_state.page = "landing"
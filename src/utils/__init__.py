@@ -1 +1,4 @@
-""""""
+"""
+"""
+from .session_memo import session_memo, clear_session_memo
+from .write_behind import commit_writes_async, take_failed_write, writes_in_flight
@@ -0,0 +1,34 @@
+# session_memo.py
+import time
+from typing import Callable, TypeVar
+
+import streamlit as st
+
+T = TypeVar("T")
+
+_MEMO_KEY = "_session_memo"
+
+
+def session_memo(key: str, ttl_s: float, fn: Callable[[], T]) -> T:
+    """
+    Per-session TTL memo kept in st.session_state. Unlike st.cache_data it is
+    never shared between users, so keystroke reruns can reuse a recent
+    Firebase read without leaking one user's view into another's.
+    """
+    memo = st.session_state.setdefault(_MEMO_KEY, {})
+    now = time.monotonic()
+    hit = memo.get(key)
+    if hit is not None and hit[1] > now:
+        return hit[0]
+    value = fn()
+    memo[key] = (value, now + ttl_s)
+    return value
+
+
+def clear_session_memo(prefix: str = "") -> None:
+    """Drop memoized entries whose key starts with `prefix` (all by default)."""
+    memo = st.session_state.get(_MEMO_KEY)
+    if not memo:
+        return
+    for key in [key for key in memo if key.startswith(prefix)]:
+        del memo[key]
@@ -0,0 +1,43 @@
+# write_behind.py
+from concurrent.futures import wait
+from typing import Optional
+
+import streamlit as st
+
+from src.firebase import fb_flush_async
+
+_PENDING_KEY = "_pending_write"
+
+
+def commit_writes_async() -> None:
+    """
+    Send this run's queued writes in the background so the rerun renders the
+    local result immediately; chained after the previous batch to keep order.
+    If that batch failed, the new one is skipped and inherits its exception,
+    so replacing the stored Future never hides the failure.
+    """
+    previous = st.session_state.get(_PENDING_KEY)
+    future = fb_flush_async(after=previous)
+    if future is not None:
+        st.session_state[_PENDING_KEY] = future
+
+
+def writes_in_flight() -> bool:
+    """True while this session's last background batch is still being sent."""
+    future = st.session_state.get(_PENDING_KEY)
+    return future is not None and not future.done()
+
+
+def take_failed_write() -> Optional[BaseException]:
+    """
+    Non-blocking check of the last background batch. Once it has finished
+    it is forgotten, and its exception (if any) is returned.
+    """
+    future = st.session_state.get(_PENDING_KEY)
+    if future is None:
+        return None
+    done, _ = wait([future], timeout=0)
+    if not done:
+        return None
+    del st.session_state[_PENDING_KEY]
+    return future.exception()